@@ -39,4 +39,37 @@ class ValidatedTableWidget(QTableWidget):
 
         # Emitimos señal basada en si hay al menos una fila válida
         all_valid = len(self.valid_rows) > 0
-        self.validation_changed.emit(all_valid)
\ No newline at end of file
+        self.validation_changed.emit(all_valid)
+
+    # Carga muchas filas de golpe: bloqueamos las señales para no validar celda a
+    # celda y emitimos una única señal de validación al final
+    def load_rows(self, rows):
+        self.blockSignals(True)
+        self.setUpdatesEnabled(False)
+        try:
+            self.setRowCount(0)
+            self.valid_rows.clear()
+            self.setRowCount(len(rows))
+            for row, values in enumerate(rows):
+                valid = True
+                for col, text in enumerate(values):
+                    item = QTableWidgetItem(text)
+                    if not self._is_positive(text):
+                        # Igual que en _validate_item, marcamos en rosa lo no válido
+                        item.setBackground(QColor("pink"))
+                        valid = False
+                    self.setItem(row, col, item)
+                if valid:
+                    self.valid_rows.add(row)
+        finally:
+            self.setUpdatesEnabled(True)
+            self.blockSignals(False)
+        self.validation_changed.emit(len(self.valid_rows) > 0)
+
+    # Comprueba si un texto es un número positivo
+    @staticmethod
+    def _is_positive(text: str) -> bool:
+        try:
+            return float(text) > 0
+        except ValueError:
+            return False
\ No newline at end of file
@@ -0,0 +1,85 @@
+# Generador vectorizado de tráfico sintético para pruebas de escala y estrés
+import argparse
+import numpy as np
+
+# Mezcla IMIX clásica: tamaños y pesos relativos (7:4:1)
+IMIX_SIZES = (40, 576, 1500)
+IMIX_WEIGHTS = (7, 4, 1)
+
+# Patrones de llegada soportados
+PATTERNS = ("poisson", "onoff", "cbr")
+
+# Genera los tamaños de un bloque: "imix" o un tamaño fijo
+def _sizes(rng, count: int, size):
+    if size == "imix":
+        weights = np.asarray(IMIX_WEIGHTS, dtype=float)
+        return rng.choice(np.asarray(IMIX_SIZES, dtype=np.int64), size=count,
+                          p=weights / weights.sum())
+    return np.full(count, int(size), dtype=np.int64)
+
+# Genera los espaciados de un bloque según el patrón de llegada. Cada magnitud
+# aleatoria sale de su propio generador (espaciados, inicios de ráfaga, pausas OFF)
+def _spacings(rngs, count: int, pattern: str, rate: float, burst_length: float,
+              off_time: float):
+    spacing_rng, start_rng, off_rng = rngs
+    if pattern == "cbr":
+        # Tasa constante: un paquete cada 1/rate
+        return np.full(count, 1.0 / rate)
+    if pattern == "poisson":
+        # Llegadas de Poisson: espaciados exponenciales de media 1/rate
+        return spacing_rng.exponential(1.0 / rate, count)
+    if pattern == "onoff":
+        # Ráfagas a tasa "rate" de longitud media burst_length, separadas por
+        # periodos OFF exponenciales de media off_time
+        starts = start_rng.random(count) < 1.0 / burst_length
+        return np.where(starts, 1.0 / rate + off_rng.exponential(off_time, count), 1.0 / rate)
+    raise ValueError(f"Unknown pattern: {pattern}")
+
+# Genera la traza en bloques (tamaños, espaciados) que caben en memoria. Cada
+# columna usa un generador hijo de la semilla, así que con la misma semilla la
+# traza es idéntica sea cual sea chunk_size
+def generate(count: int, pattern: str = "poisson", size="imix", rate: float = 1.0,
+             seed=None, chunk_size: int = 1_000_000, burst_length: float = 10.0,
+             off_time: float = 10.0):
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if pattern not in PATTERNS:
+        raise ValueError(f"Unknown pattern: {pattern}")
+    size_rng, *spacing_rngs = [np.random.default_rng(child)
+                               for child in np.random.SeedSequence(seed).spawn(4)]
+    remaining = count
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        yield (_sizes(size_rng, n, size),
+               _spacings(spacing_rngs, n, pattern, rate, burst_length, off_time))
+        remaining -= n
+
+# Escribe los bloques como CSV tamaño,espaciado, el formato que importa la interfaz
+def write_csv(path: str, chunks):
+    with open(path, "w") as f:
+        for sizes, spacings in chunks:
+            np.savetxt(f, np.column_stack((sizes, spacings)), fmt=("%d", "%.17g"),
+                       delimiter=",")
+
+# Punto de entrada para generar trazas desde la línea de comandos
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic traffic generator")
+    parser.add_argument("output", help="CSV file to write (size,spacing rows)")
+    parser.add_argument("-n", "--count", type=int, default=1000)
+    parser.add_argument("--pattern", choices=PATTERNS, default="poisson")
+    parser.add_argument("--size", default="imix", help='"imix" or a fixed size')
+    parser.add_argument("--rate", type=float, default=1.0, help="packets per time unit")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--burst-length", type=float, default=10.0)
+    parser.add_argument("--off-time", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    write_csv(args.output, generate(args.count, args.pattern, args.size, args.rate,
+                                    args.seed, args.chunk_size, args.burst_length,
+                                    args.off_time))
+
+if __name__ == "__main__":
+    main()
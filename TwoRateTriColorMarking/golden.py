@@ -0,0 +1,198 @@
+# Corpus de trazas de referencia (golden) para trTCM: comprueba que los colores y
+# los tokens son idénticos en los motores escalar, por lotes y paralelo, y que el
+# rendimiento no cae por debajo de la línea base de esta máquina.
+#
+# Hoy los tres motores comparten el mismo bucle de TokenBucket.mark_packet: "por
+# lotes" solo cambia la entrada (columnas numéricas) y "paralelo" reparte trazas
+# entre procesos. La comprobación de paridad es el arnés para futuros motores
+# (vectorizados o nativos), que deberán reproducir el corpus bit a bit.
+#
+# Los casos con columna "pre_colors" marcan en modo color-aware; "pre_color_variant"
+# elige la enumeración Color de srTCM o de trTCM, como las mezcla chain.py
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import importlib.util
+from array import array
+from itertools import repeat
+from engine import mark_chunks, mark_parallel
+from models import Color, Packet, TokenBucket
+
+# Fichero con las trazas de entrada y los resultados esperados (única fuente de verdad)
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "corpus.json")
+
+# Líneas base de rendimiento por máquina; no se versiona porque depende del hardware
+BASELINE_PATH = os.path.join(os.path.dirname(CORPUS_PATH), "baseline.json")
+
+# Nombre de la columna del segundo bucket en esta variante
+BUCKET_COLUMN = "tp"
+
+# Paquetes de la traza sintética usada para medir el rendimiento
+THROUGHPUT_PACKETS = 200_000
+
+# Repeticiones de la medida; se toma la mejor para filtrar el ruido de la máquina
+THROUGHPUT_REPEATS = 5
+
+# Cargamos los modelos srTCM de la carpeta superior sin chocar con nuestro "models"
+def _load_srtcm_models():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "models.py")
+    spec = importlib.util.spec_from_file_location("srtcm_models", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+# Enumeraciones Color de cada variante para los colores previos de los casos
+COLOR_VARIANTS = {"srtcm": _load_srtcm_models().Color, "trtcm": Color}
+
+# Argumentos de los motores para un caso: (parámetros, tamaños, espaciados) y, si
+# el caso es color-aware, la lista de colores previos (None = sin color previo)
+def case_args(case: dict) -> tuple:
+    args = (case["params"], case["sizes"], case["spacings"])
+    if "pre_colors" not in case:
+        return args
+    enum = COLOR_VARIANTS[case.get("pre_color_variant", "trtcm")]
+    return args + ([None if name is None else enum[name.upper()]
+                    for name in case["pre_colors"]],)
+
+# Motor escalar: TokenBucket.mark_packet paquete a paquete
+def run_scalar(params: dict, sizes, spacings, pre_colors=None):
+    token_bucket = TokenBucket(**params)
+    results = []
+    arrival_time = 0.0
+    for size, spacing, pre_color in zip(sizes, spacings, pre_colors or repeat(None)):
+        arrival_time += spacing
+        packet = Packet(size=size, spacing=spacing, arrival_time=arrival_time)
+        color = token_bucket.mark_packet(packet, pre_color)
+        results.append((color.plain, token_bucket.tc, getattr(token_bucket, BUCKET_COLUMN)))
+    return results
+
+# Motor por lotes: engine.mark_chunks sobre columnas numéricas
+def run_batch(params: dict, sizes, spacings, pre_colors=None):
+    chunk = (array("q", sizes), array("d", spacings)) + ((pre_colors,) if pre_colors else ())
+    return [(packet.color.plain, tc, bucket)
+            for packet, tc, bucket in mark_chunks(TokenBucket(**params), [chunk])]
+
+# Compara los resultados de un motor con los esperados y devuelve los errores
+def _compare(engine_name: str, case: dict, results) -> list:
+    expected = [tuple(row) for row in case["expected"]]
+    if results == expected:
+        return []
+    for index, (got, want) in enumerate(zip(results, expected)):
+        if got != want:
+            return [f"{case['name']} [{engine_name}] packet {index}: got {got}, expected {want}"]
+    return [f"{case['name']} [{engine_name}] length {len(results)} != {len(expected)}"]
+
+# Comprueba la paridad exacta de los tres motores con el corpus
+def check_parity(corpus: dict) -> list:
+    errors = []
+    cases = corpus["cases"]
+    parallel = mark_parallel([case_args(case) for case in cases])
+    for case, parallel_results in zip(cases, parallel):
+        args = case_args(case)
+        errors += _compare("scalar", case, run_scalar(*args))
+        errors += _compare("batch", case, run_batch(*args))
+        errors += _compare("parallel", case, parallel_results)
+    return errors
+
+# Mide paquetes por segundo de los motores escalar y por lotes: tras una pasada de
+# calentamiento se queda con la mejor de varias repeticiones
+def measure_throughput(params: dict, repeats: int = THROUGHPUT_REPEATS) -> dict:
+    sizes = [(40, 576, 1500)[i % 3] for i in range(THROUGHPUT_PACKETS)]
+    spacings = [0.5] * THROUGHPUT_PACKETS
+    throughput = {}
+    for name, run in (("scalar", run_scalar), ("batch", run_batch)):
+        run(params, sizes[:THROUGHPUT_PACKETS // 10], spacings[:THROUGHPUT_PACKETS // 10])
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run(params, sizes, spacings)
+            best = min(best, time.perf_counter() - start)
+        throughput[name] = THROUGHPUT_PACKETS / best
+    return throughput
+
+# Recalcula los resultados esperados de las trazas del corpus con el motor escalar
+def regenerate(corpus: dict) -> dict:
+    for case in corpus["cases"]:
+        case["expected"] = run_scalar(*case_args(case))
+    return corpus
+
+# Devuelve las líneas base guardadas para esta máquina (vacío si no hay)
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get(platform.node(), {})
+
+# Guarda las líneas base de esta máquina sin tocar las de otras
+def save_baseline(throughput: dict, path: str = BASELINE_PATH):
+    baselines = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            baselines = json.load(f)
+    baselines[platform.node()] = {name: round(pps) for name, pps in throughput.items()}
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=1)
+
+# Punto de entrada del ejecutor del corpus
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="trTCM golden-trace regression runner")
+    parser.add_argument("--regenerate", action="store_true",
+                        help="recompute expected outputs in corpus.json from its "
+                             "stored inputs with the scalar engine")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store the measured packets/s as this host's baseline "
+                             "(only if it passes the gate against the current one)")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="fail when this host has no baseline instead of "
+                             "skipping the throughput gate (use in CI)")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="baseline file, e.g. one persisted outside the checkout")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="allowed fractional drop below the baseline")
+    parser.add_argument("--repeats", type=int, default=THROUGHPUT_REPEATS,
+                        help="timed runs per engine; the best one is kept")
+    args = parser.parse_args(argv)
+
+    with open(CORPUS_PATH) as f:
+        corpus = json.load(f)
+    if args.regenerate:
+        corpus = regenerate(corpus)
+        with open(CORPUS_PATH, "w") as f:
+            json.dump(corpus, f, indent=1)
+
+    errors = check_parity(corpus)
+    throughput = measure_throughput(corpus["cases"][0]["params"], args.repeats)
+    baseline = load_baseline(args.baseline)
+    if not baseline and not args.update_baseline:
+        message = (f"No throughput baseline for {platform.node()} in {args.baseline}; "
+                   "run with --update-baseline to enable the gate")
+        if args.require_baseline:
+            errors.append(message)
+        else:
+            print(message)
+    for name, pps in throughput.items():
+        reference = baseline.get(name)
+        print(f"{name}: {pps:.0f} pkt/s (baseline {reference or 0:.0f})")
+        if reference and pps < reference * (1 - args.tolerance):
+            errors.append(f"{name} throughput {pps:.0f} pkt/s below baseline {reference:.0f}")
+
+    # Una medida que no pasa la puerta no sustituye a la línea base: para aceptar
+    # una bajada intencionada hay que borrar antes la entrada de esta máquina
+    if args.update_baseline:
+        if errors:
+            print("Baseline not updated because the run failed", file=sys.stderr)
+        else:
+            save_baseline(throughput, args.baseline)
+
+    for error in errors:
+        print(error, file=sys.stderr)
+    print(f"{len(corpus['cases'])} cases, {len(errors)} failures")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
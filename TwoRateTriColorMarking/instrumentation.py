@@ -0,0 +1,173 @@
+# Importamos las bibliotecas necesarias para medir tiempos y perfilar
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Nombre de la etapa que envuelve el procesamiento completo de un paquete
+TOTAL_STAGE = "total"
+
+# Temporizador vacío que se reutiliza cuando la instrumentación está desactivada
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+# Temporizador que acumula el tiempo de una etapa en la instrumentación
+class _StageTimer:
+    __slots__ = ("stats", "start")
+
+    def __init__(self, stats: list):
+        self.stats = stats  # Lista [llamadas, nanosegundos totales] de la etapa
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats[0] += 1
+        self.stats[1] += time.perf_counter_ns() - self.start
+        return False
+
+# Perfilador por muestreo: captura periódicamente la pila del hilo observado
+class _Sampler:
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval          # Segundos entre muestras
+        self.samples = Counter()          # Muestras por función
+        self._thread_id = threading.get_ident()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while self._running:
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                code = frame.f_code
+                self.samples[f"{code.co_filename}:{frame.f_lineno}({code.co_name})"] += 1
+            time.sleep(self.interval)
+
+    def report(self, limit: int) -> str:
+        total = sum(self.samples.values()) or 1
+        lines = [f"{count:8d} {100.0 * count / total:6.2f}%  {location}"
+                 for location, count in self.samples.most_common(limit)]
+        return "\n".join(lines)
+
+# Capa de instrumentación con temporizadores y contadores por etapa
+class Instrumentation:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled  # Si es False, los temporizadores no miden nada
+        self.timings = {}       # Etapa -> [llamadas, nanosegundos totales]
+        self.counters = {}      # Nombre -> valor acumulado
+        self._profiler = None   # Perfilador activo (cProfile o muestreo)
+
+    # Devuelve un contexto que mide el tiempo de la etapa indicada
+    def timer(self, stage: str):
+        if not self.enabled:
+            return _NULL_TIMER
+        stats = self.timings.get(stage)
+        if stats is None:
+            stats = self.timings[stage] = [0, 0]
+        return _StageTimer(stats)
+
+    # Incrementa un contador con nombre
+    def count(self, name: str, amount: int = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Sustituye un método de la instancia por una versión medida
+    def instrument_method(self, obj, name: str, stage: str = None):
+        method = getattr(type(obj), name).__get__(obj)
+        stage = stage or name
+        timer = self.timer
+
+        def timed(*args, **kwargs):
+            with timer(stage):
+                return method(*args, **kwargs)
+
+        setattr(obj, name, timed)
+
+    # Restaura el método original de la instancia
+    def uninstrument_method(self, obj, name: str):
+        obj.__dict__.pop(name, None)
+
+    # Inicia la captura de perfil en modo "cprofile" o "sampling"
+    def start_profile(self, mode: str = "cprofile", interval: float = 0.001):
+        if mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif mode == "sampling":
+            self._profiler = _Sampler(interval)
+            self._profiler.start()
+        else:
+            raise ValueError(f"Unknown profile mode: {mode}")
+
+    # Detiene la captura y devuelve el informe en texto
+    def stop_profile(self, limit: int = 20) -> str:
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return ""
+        if isinstance(profiler, _Sampler):
+            profiler.stop()
+            return profiler.report(limit)
+        profiler.disable()
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    # Limpia todas las medidas acumuladas
+    def reset(self):
+        self.timings.clear()
+        self.counters.clear()
+
+    # Calcula el desglose por etapa: paquetes/s y µs por paquete
+    def breakdown(self) -> dict:
+        packets = self.counters.get("packets", 0)
+        total_ns = self.timings.get(TOTAL_STAGE, [0, 0])[1]
+        stages = {}
+        for stage, (calls, elapsed_ns) in self.timings.items():
+            stages[stage] = {
+                "calls": calls,
+                "total_us": elapsed_ns / 1e3,
+                "us_per_call": elapsed_ns / 1e3 / calls if calls else 0.0,
+                "us_per_packet": elapsed_ns / 1e3 / packets if packets else 0.0,
+            }
+        return {
+            "packets": packets,
+            "packets_per_s": packets * 1e9 / total_ns if total_ns else 0.0,
+            "stages": stages,
+            "counters": dict(self.counters),
+        }
+
+    # Serializa el desglose como JSON
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps(self.breakdown(), indent=indent)
+
+    # Formatea el desglose como texto para el panel de la interfaz
+    def format_breakdown(self) -> str:
+        data = self.breakdown()
+        lines = [f"Packets: {data['packets']}  ({data['packets_per_s']:.0f} pkt/s)"]
+        for stage, stats in data["stages"].items():
+            lines.append(f"{stage:<12} {stats['us_per_packet']:10.2f} µs/pkt"
+                         f"  ({stats['calls']} calls)")
+        return "\n".join(lines)
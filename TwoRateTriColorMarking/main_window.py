@@ -2,15 +2,48 @@
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                               QPushButton, QSpinBox, QLabel, QHeaderView,
                               QProgressBar, QGroupBox, QTableWidgetItem, 
-                              QTableWidget)
-from PySide6.QtCore import Qt, QTimer  # Importamos elementos core de Qt
-from PySide6.QtGui import QColor       # Importamos QColor para el manejo de colores
+                              QTableWidget, QCheckBox, QFileDialog,
+                              QMessageBox)
+from PySide6.QtCore import Qt, QTimer, QPointF  # Importamos elementos core de Qt
+from PySide6.QtGui import QColor, QPainter        # Colores y pintado del sparkline
 from custom_widgets import ValidatedTableWidget  # Nuestro widget personalizado
 from models import TokenBucket, Packet, Color    # Nuestros modelos de datos
+from instrumentation import Instrumentation, TOTAL_STAGE  # Medición por etapas
+from engine import read_trace                    # Lector de trazas CSV
+from export import export_results, has_pyarrow   # Exportación de resultados
+from collections import deque                    # Buffer circular del sparkline
+from itertools import islice
+
+# Máximo de filas que se cargan en la tabla de entrada al importar una traza
+MAX_IMPORT_ROWS = 10000
+
+# Intervalo mínimo entre repintados del visualizador (~30 fps)
+FRAME_INTERVAL_MS = 33
+
+# Gráfico compacto con los niveles de llenado recientes de un bucket
+class Sparkline(QWidget):
+    def __init__(self, capacity: int = 120):
+        super().__init__()
+        self.values = deque(maxlen=capacity)  # Buffer circular de niveles (0..1)
+        self.setMinimumHeight(30)
+
+    # Añade un nivel de llenado (fracción entre 0 y 1)
+    def add(self, fraction: float):
+        self.values.append(fraction)
+
+    def paintEvent(self, event):
+        if len(self.values) < 2:
+            return
+        painter = QPainter(self)
+        painter.setPen(QColor("#3498db"))
+        width, height = self.width() - 1, self.height() - 1
+        step = width / (self.values.maxlen - 1)
+        painter.drawPolyline([QPointF(i * step, height - value * height)
+                              for i, value in enumerate(self.values)])
 
 # Clase para visualizar el estado de los token buckets
 class TokenBucketVisualizer(QWidget):
-    def __init__(self):
+    def __init__(self, sparkline: bool = False):
         super().__init__()
         layout = QVBoxLayout(self)
         
@@ -34,20 +67,80 @@ class TokenBucketVisualizer(QWidget):
         pbs_layout.addWidget(self.pbs_label)
         pbs_layout.addWidget(self.pir_label)
         
+        # Sparklines opcionales con el historial reciente de llenado
+        self.cbs_sparkline = self.pbs_sparkline = None
+        if sparkline:
+            self.cbs_sparkline = Sparkline()
+            self.pbs_sparkline = Sparkline()
+            cbs_layout.addWidget(self.cbs_sparkline)
+            pbs_layout.addWidget(self.pbs_sparkline)
+        
         layout.addWidget(cbs_group)
         layout.addWidget(pbs_group)
+        
+        # Estado pendiente y estado mostrado (redondeado a la resolución de pantalla)
+        self._state = None
+        self._shown = None
+        # Temporizador de frame: agrupa las actualizaciones en un repintado por frame
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.setInterval(FRAME_INTERVAL_MS)
+        self.frame_timer.timeout.connect(self._render)
 
+    # Guarda el estado y programa el repintado para el siguiente frame
     def update_visualization(self, cbs: float, pbs: float, cbs_max: float, 
                            pbs_max: float, cir: float, pir: float):
-        self.cbs_bar.setMaximum(int(cbs_max))
-        self.cbs_bar.setValue(int(cbs))
-        self.cbs_label.setText(f"{cbs:.2f}/{cbs_max:.2f}")
-        self.cir_label.setText(f"CIR: {cir:.2f}")
-        
-        self.pbs_bar.setMaximum(int(pbs_max))
-        self.pbs_bar.setValue(int(pbs))
-        self.pbs_label.setText(f"{pbs:.2f}/{pbs_max:.2f}")
-        self.pir_label.setText(f"PIR: {pir:.2f}")
+        self._state = (cbs, pbs, cbs_max, pbs_max, cir, pir)
+        if self.cbs_sparkline is not None:
+            self.cbs_sparkline.add(cbs / cbs_max if cbs_max else 0.0)
+            self.pbs_sparkline.add(pbs / pbs_max if pbs_max else 0.0)
+        if not self.frame_timer.isActive():
+            self.frame_timer.start()
+
+    # Repinta los widgets si el estado cambió a la resolución mostrada
+    def _render(self):
+        cbs, pbs, cbs_max, pbs_max, cir, pir = self._state
+        shown = tuple(round(value, 2) for value in self._state)
+        if shown != self._shown:
+            self._shown = shown
+            self.cbs_bar.setMaximum(int(cbs_max))
+            self.cbs_bar.setValue(int(cbs))
+            self.cbs_label.setText(f"{cbs:.2f}/{cbs_max:.2f}")
+            self.cir_label.setText(f"CIR: {cir:.2f}")
+            
+            self.pbs_bar.setMaximum(int(pbs_max))
+            self.pbs_bar.setValue(int(pbs))
+            self.pbs_label.setText(f"{pbs:.2f}/{pbs_max:.2f}")
+            self.pir_label.setText(f"PIR: {pir:.2f}")
+        if self.cbs_sparkline is not None:
+            self.cbs_sparkline.update()
+            self.pbs_sparkline.update()
+
+    # Olvida el historial del sparkline y fuerza el repintado en el siguiente frame
+    def reset(self):
+        self._shown = None
+        if self.cbs_sparkline is not None:
+            self.cbs_sparkline.values.clear()
+            self.pbs_sparkline.values.clear()
+
+# Panel que muestra el desglose de tiempos por etapa
+class InstrumentationPanel(QGroupBox):
+    def __init__(self, instrumentation: Instrumentation):
+        super().__init__("Profiling")
+        self.instrumentation = instrumentation
+        layout = QVBoxLayout(self)
+        self.enabled_check = QCheckBox("Enabled")  # Activa o desactiva la medición
+        self.stats_label = QLabel("")              # Desglose por etapa
+        self.stats_label.setStyleSheet("font-family: monospace;")
+        layout.addWidget(self.enabled_check)
+        layout.addWidget(self.stats_label)
+
+    # Refresca el texto del desglose si la medición está activa
+    def refresh(self):
+        if self.instrumentation.enabled:
+            self.stats_label.setText(self.instrumentation.format_breakdown())
+        else:
+            self.stats_label.setText("")
 
 # Ventana principal de la aplicación
 class MainWindow(QMainWindow):
@@ -66,7 +159,7 @@ class MainWindow(QMainWindow):
         layout.addLayout(params_layout)
         
         # Añadimos el visualizador de token buckets
-        self.visualizer = TokenBucketVisualizer()
+        self.visualizer = TokenBucketVisualizer(sparkline=True)
         layout.addWidget(self.visualizer)
         
         # Creamos la tabla de entrada de paquetes
@@ -83,10 +176,12 @@ class MainWindow(QMainWindow):
         self.step_btn = QPushButton("Step")
         self.auto_btn = QPushButton("Auto")
         self.reset_btn = QPushButton("Reset")
+        self.import_btn = QPushButton("Import")
+        self.export_btn = QPushButton("Export")
         
         # Añadimos todos los botones al layout
         for btn in (self.add_row_btn, self.remove_row_btn, self.step_btn, 
-                   self.auto_btn, self.reset_btn):
+                   self.auto_btn, self.reset_btn, self.import_btn, self.export_btn):
             buttons_layout.addWidget(btn)
         layout.addLayout(buttons_layout)
         
@@ -98,9 +193,15 @@ class MainWindow(QMainWindow):
         self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         layout.addWidget(self.results_table)
         
+        # Añadimos el panel de instrumentación
+        self.instrumentation = Instrumentation()
+        self.instrumentation_panel = InstrumentationPanel(self.instrumentation)
+        layout.addWidget(self.instrumentation_panel)
+        
         # Inicializamos el estado de la aplicación
         self.current_row = 0
         self.token_bucket = None
+        self.results = []  # Resultados con precisión completa (paquete, tc, tp)
         self.animation_timer = QTimer()
         self.animation_timer.timeout.connect(self._step)
         
@@ -110,7 +211,10 @@ class MainWindow(QMainWindow):
         self.step_btn.clicked.connect(self._step)
         self.auto_btn.clicked.connect(self._toggle_auto)
         self.reset_btn.clicked.connect(self._reset)
+        self.import_btn.clicked.connect(self._import_trace)
+        self.export_btn.clicked.connect(self._export_results)
         self.input_table.validation_changed.connect(self._update_button_states)
+        self.instrumentation_panel.enabled_check.toggled.connect(self._toggle_instrumentation)
         
         # Añadimos una fila inicial y reseteamos
         self._add_row()
@@ -139,17 +243,55 @@ class MainWindow(QMainWindow):
         if row >= 0:
             self.input_table.removeRow(row)
 
+    # Carga una traza CSV (tamaño,espaciado), p. ej. del generador, en la tabla de entrada
+    def _import_trace(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import trace", "", "CSV files (*.csv)")
+        if not path:
+            return
+        rows = list(islice(read_trace(path), MAX_IMPORT_ROWS + 1))
+        if len(rows) > MAX_IMPORT_ROWS:
+            # Las trazas grandes congelarían la tabla: se recortan y se avisa
+            rows = rows[:MAX_IMPORT_ROWS]
+            QMessageBox.warning(self, "Import trace",
+                                f"Only the first {MAX_IMPORT_ROWS} rows were imported. "
+                                "Use engine.py to mark the full trace.")
+        self.input_table.load_rows(rows)
+        self._reset()
+        self._update_button_states(len(self.input_table.valid_rows) > 0)
+
+    # Exporta los resultados con precisión completa a Parquet, Arrow o CSV
+    def _export_results(self):
+        filters = "CSV files (*.csv)"
+        if has_pyarrow():
+            filters = "Parquet files (*.parquet);;Arrow IPC files (*.arrow);;" + filters
+        path, selected = QFileDialog.getSaveFileName(self, "Export results", "", filters)
+        if path:
+            # Si no se escribe extensión, usamos la del filtro elegido (o .csv si el
+            # diálogo no devuelve ningún filtro)
+            if "." not in path.rsplit("/", 1)[-1]:
+                path += selected[selected.index("*") + 1:-1] if "*" in selected else ".csv"
+            try:
+                export_results(path, self.results, bucket_column="tp")
+            except (ImportError, ValueError, OSError) as error:
+                QMessageBox.critical(self, "Export results", str(error))
+
     # Resetea el estado de la aplicación
     def _reset(self):
         self.current_row = 0
+        self.results = []
         cir = self.cir_input.itemAt(1).widget().value()
         pir = self.pir_input.itemAt(1).widget().value()
         cbs = self.cbs_input.itemAt(1).widget().value()
         pbs = self.pbs_input.itemAt(1).widget().value()
         
         self.token_bucket = TokenBucket(cir=cir, pir=pir, cbs=cbs, pbs=pbs)
+        if self.instrumentation.enabled:
+            self.instrumentation.instrument_method(self.token_bucket, "update")
+        self.instrumentation.reset()
+        self.instrumentation_panel.refresh()
         self.results_table.setRowCount(0)
         
+        self.visualizer.reset()
         self.visualizer.update_visualization(
             self.token_bucket.tc,
             self.token_bucket.tp,
@@ -168,6 +310,14 @@ class MainWindow(QMainWindow):
             self.auto_btn.setText("Auto")
             return False
 
+        timer = self.instrumentation.timer
+        with timer(TOTAL_STAGE):
+            result = self._process_row(timer)
+        self.instrumentation_panel.refresh()
+        return result
+
+    # Procesa la fila actual midiendo cada etapa
+    def _process_row(self, timer):
         size_item = self.input_table.item(self.current_row, 0)
         spacing_item = self.input_table.item(self.current_row, 1)
 
@@ -177,42 +327,50 @@ class MainWindow(QMainWindow):
 
         try:
             # Validamos que ambos valores sean números positivos
-            size = float(size_item.text())
-            spacing = float(spacing_item.text())
-            
-            if size <= 0 or spacing <= 0:
-                raise ValueError
-            
-            # Calculamos el tiempo de llegada
-            if self.current_row == 0:
-                arrival_time = spacing
-            else:
-                prev_arrival = float(self.results_table.item(self.current_row - 1, 1).text())
-                arrival_time = prev_arrival + spacing
+            with timer("parse"):
+                size = float(size_item.text())
+                spacing = float(spacing_item.text())
+                
+                if size <= 0 or spacing <= 0:
+                    raise ValueError
+                
+                # Calculamos el tiempo de llegada en coma flotante; la tabla solo lo muestra
+                if not self.results:
+                    arrival_time = spacing
+                else:
+                    arrival_time = self.results[-1][0].arrival_time + spacing
 
             # Creamos y procesamos el paquete
             packet = Packet(size=int(size), spacing=spacing, arrival_time=arrival_time)
-            color = self.token_bucket.mark_packet(packet)
+            with timer("mark_packet"):
+                color = self.token_bucket.mark_packet(packet)
+            self.instrumentation.count("packets")
+
+            # Guardamos el resultado con precisión completa para exportarlo
+            packet.color = color
+            self.results.append((packet, self.token_bucket.tc, self.token_bucket.tp))
 
             # Añadimos los resultados a la tabla
-            self.results_table.insertRow(self.current_row)
-            self.results_table.setItem(self.current_row, 0, QTableWidgetItem(str(size)))
-            self.results_table.setItem(self.current_row, 1, QTableWidgetItem(f"{arrival_time:.2f}"))
-            color_item = QTableWidgetItem(color.plain)
-            color_item.setForeground(QColor(color.color_code))
-            self.results_table.setItem(self.current_row, 2, color_item)
-            self.results_table.setItem(self.current_row, 3, QTableWidgetItem(f"{self.token_bucket.tc:.2f}"))
-            self.results_table.setItem(self.current_row, 4, QTableWidgetItem(f"{self.token_bucket.tp:.2f}"))
+            with timer("table_insert"):
+                self.results_table.insertRow(self.current_row)
+                self.results_table.setItem(self.current_row, 0, QTableWidgetItem(str(size)))
+                self.results_table.setItem(self.current_row, 1, QTableWidgetItem(f"{arrival_time:.2f}"))
+                color_item = QTableWidgetItem(color.plain)
+                color_item.setForeground(QColor(color.color_code))
+                self.results_table.setItem(self.current_row, 2, color_item)
+                self.results_table.setItem(self.current_row, 3, QTableWidgetItem(f"{self.token_bucket.tc:.2f}"))
+                self.results_table.setItem(self.current_row, 4, QTableWidgetItem(f"{self.token_bucket.tp:.2f}"))
 
             # Actualizamos la visualización
-            self.visualizer.update_visualization(
-                self.token_bucket.tc,
-                self.token_bucket.tp,
-                self.token_bucket.cbs,
-                self.token_bucket.pbs,  # Cambiado de ebs a pbs
-                self.token_bucket.cir,
-                self.token_bucket.pir
-            )
+            with timer("visualize"):
+                self.visualizer.update_visualization(
+                    self.token_bucket.tc,
+                    self.token_bucket.tp,
+                    self.token_bucket.cbs,
+                    self.token_bucket.pbs,  # Cambiado de ebs a pbs
+                    self.token_bucket.cir,
+                    self.token_bucket.pir
+                )
 
             self.current_row += 1
             return True
@@ -255,4 +413,13 @@ class MainWindow(QMainWindow):
                       self.cbs_input, self.pbs_input):
             layout.addLayout(widget)
         
-        return layout
\ No newline at end of file
+        return layout
+
+    # Activa o desactiva la instrumentación del marcado
+    def _toggle_instrumentation(self, enabled: bool):
+        self.instrumentation.enabled = enabled
+        if enabled:
+            self.instrumentation.instrument_method(self.token_bucket, "update")
+        else:
+            self.instrumentation.uninstrument_method(self.token_bucket, "update")
+        self.instrumentation_panel.refresh()
\ No newline at end of file
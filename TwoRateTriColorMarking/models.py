@@ -21,6 +21,8 @@ class Packet:
     spacing: float                # Tiempo entre este paquete y el anterior
     arrival_time: float           # Tiempo de llegada absoluto
     color: Optional[Color] = None # Color asignado (inicialmente None)
+    flow: int = 0                 # Identificador de flujo (para policers por flujo)
+    port: int = 0                 # Puerto de salida (para policers por puerto)
 
 # Clase principal que implementa el algoritmo Token Bucket
 class TokenBucket:
@@ -46,14 +48,19 @@ class TokenBucket:
         
         self.last_update = current_time
 
-    def mark_packet(self, packet: Packet) -> Color:
+    def mark_packet(self, packet: Packet, pre_color: Optional[Color] = None) -> Color:
         self.update(packet.arrival_time)
         
-        if self.tc >= packet.size:
+        # En modo color-aware un paquete nunca mejora su color previo. Normalizamos
+        # por valor para aceptar también colores de la variante srTCM
+        if pre_color is not None:
+            pre_color = Color(pre_color.value)
+        
+        if self.tc >= packet.size and pre_color in (None, Color.GREEN):
             # Si hay suficientes tokens en tc, marcamos como verde
             self.tc -= packet.size
             return Color.GREEN
-        elif self.tp >= packet.size:
+        elif self.tp >= packet.size and pre_color is not Color.RED:
             # Si hay suficientes tokens en tp, marcamos como amarillo
             self.tp -= packet.size
             return Color.YELLOW
@@ -0,0 +1,134 @@
+# Cadena jerárquica de policers: compone TokenBucket de srTCM y trTCM en un DAG
+import argparse
+import csv
+import importlib.util
+import os
+import sys
+from models import Packet, TokenBucket as SrTCMBucket
+
+# Cargamos los modelos trTCM desde su carpeta sin chocar con nuestro "models"
+def _load_trtcm_models():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "TwoRateTriColorMarking", "models.py")
+    spec = importlib.util.spec_from_file_location("trtcm_models", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+trtcm_models = _load_trtcm_models()
+TrTCMBucket = trtcm_models.TokenBucket
+
+# Gravedad de cada color para combinar las entradas de varias etapas previas
+_SEVERITY = {"green": 0, "yellow": 1, "red": 2}
+
+# Devuelve el peor color de una lista (independiente de la variante del modelo)
+def worst_color(colors):
+    return max(colors, key=lambda color: _SEVERITY[color.plain])
+
+# Etapa de la cadena: un bucket por clave (por ejemplo por flujo) o uno compartido
+class PolicerStage:
+    def __init__(self, name: str, factory, upstream=(), key=None):
+        self.name = name                # Nombre único de la etapa
+        self.factory = factory          # Crea un TokenBucket nuevo para cada clave
+        self.upstream = tuple(upstream) # Etapas cuyo color alimenta a esta
+        self.key = key                  # Función paquete -> clave, o None si es agregada
+        self.buckets = {}               # Clave -> TokenBucket
+
+    # Devuelve (creándolo si hace falta) el bucket que corresponde al paquete
+    def bucket_for(self, packet: Packet):
+        key = self.key(packet) if self.key else None
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = self.factory()
+        return bucket
+
+# Cadena de policers que marca cada paquete en una sola pasada por todas las etapas
+class PolicerChain:
+    def __init__(self):
+        self.stages = []  # Etapas en orden topológico (cada una tras sus previas)
+        self._names = set()
+
+    # Añade una etapa; sus etapas previas deben existir ya, lo que evita ciclos
+    def add_stage(self, name: str, factory, upstream=(), key=None) -> PolicerStage:
+        if name in self._names:
+            raise ValueError(f"Duplicate stage: {name}")
+        missing = [stage for stage in upstream if stage not in self._names]
+        if missing:
+            raise ValueError(f"Unknown upstream stages: {', '.join(missing)}")
+        stage = PolicerStage(name, factory, upstream, key)
+        self.stages.append(stage)
+        self._names.add(name)
+        return stage
+
+    # Marca un paquete en todas las etapas y devuelve el color de cada una
+    def mark_packet(self, packet: Packet) -> dict:
+        colors = {}
+        for stage in self.stages:
+            # Las etapas raíz marcan en modo color-blind; el resto, color-aware
+            pre_color = worst_color([colors[name] for name in stage.upstream]) \
+                if stage.upstream else None
+            colors[stage.name] = stage.bucket_for(packet).mark_packet(packet, pre_color)
+        return colors
+
+    # Recorre la traza una vez; el color final es el peor de las etapas terminales
+    def run(self, packets):
+        feeding = {name for stage in self.stages for name in stage.upstream}
+        sinks = [stage.name for stage in self.stages if stage.name not in feeding]
+        for packet in packets:
+            colors = self.mark_packet(packet)
+            packet.color = worst_color([colors[name] for name in sinks])
+            yield packet, colors
+
+# Crea la cadena habitual: srTCM por flujo que alimenta un trTCM por puerto
+def per_flow_to_port_chain(cir: float, cbs: float, ebs: float, port_cir: float,
+                           port_pir: float, port_cbs: float, port_pbs: float) -> PolicerChain:
+    chain = PolicerChain()
+    chain.add_stage("flow_srtcm", lambda: SrTCMBucket(cir=cir, cbs=cbs, ebs=ebs),
+                    key=lambda packet: packet.flow)
+    chain.add_stage("port_trtcm", lambda: TrTCMBucket(cir=port_cir, pir=port_pir,
+                                                cbs=port_cbs, pbs=port_pbs),
+                    upstream=("flow_srtcm",), key=lambda packet: packet.port)
+    return chain
+
+# Lee una traza CSV con columnas tamaño, espaciado y, opcionalmente, flujo y puerto
+def read_packets(path: str):
+    arrival_time = 0.0
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            try:
+                size = int(row[0])
+                spacing = float(row[1])
+                flow = int(row[2]) if len(row) > 2 else 0
+                port = int(row[3]) if len(row) > 3 else 0
+            except (ValueError, IndexError):
+                continue
+            arrival_time += spacing
+            yield Packet(size=size, spacing=spacing, arrival_time=arrival_time,
+                         flow=flow, port=port)
+
+# Punto de entrada para simular la cadena sobre una traza sin interfaz
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-flow srTCM feeding a per-port trTCM")
+    parser.add_argument("trace", help="CSV file with size,spacing[,flow[,port]] rows")
+    parser.add_argument("--cir", type=float, default=1.0)
+    parser.add_argument("--cbs", type=float, default=2000)
+    parser.add_argument("--ebs", type=float, default=2000)
+    parser.add_argument("--port-cir", type=float, default=1000)
+    parser.add_argument("--port-pir", type=float, default=2000)
+    parser.add_argument("--port-cbs", type=float, default=2000)
+    parser.add_argument("--port-pbs", type=float, default=4000)
+    args = parser.parse_args(argv)
+
+    chain = per_flow_to_port_chain(args.cir, args.cbs, args.ebs, args.port_cir,
+                                   args.port_pir, args.port_cbs, args.port_pbs)
+    names = [stage.name for stage in chain.stages]
+    print(",".join(["size", "arrival_time", "flow", "port"] + names + ["color"]))
+    for packet, colors in chain.run(read_packets(args.trace)):
+        stage_colors = [colors[name].plain for name in names]
+        print(",".join([str(packet.size), str(packet.arrival_time), str(packet.flow),
+                        str(packet.port)]
+                       + stage_colors + [packet.color.plain]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# Motor de marcado sin interfaz gráfica para ejecutar trazas completas.
+# No depende de Qt: solo importa los modelos y la instrumentación
+import argparse
+import csv
+import sys
+from itertools import repeat
+from instrumentation import Instrumentation, TOTAL_STAGE
+from models import TokenBucket, Packet
+
+# Lee una traza CSV con columnas tamaño y espaciado (la cabecera es opcional)
+def read_trace(path: str):
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2:
+                yield row[0], row[1]
+
+# Marca cada fila (tamaño, espaciado) y devuelve (paquete, tc, te) por paquete
+def mark_trace(token_bucket: TokenBucket, rows, instrumentation: Instrumentation = None):
+    inst = instrumentation or Instrumentation()
+    timer = inst.timer
+    if inst.enabled:
+        inst.instrument_method(token_bucket, "update")
+
+    # El try/finally restaura el bucket aunque el consumidor no agote el generador
+    try:
+        arrival_time = 0.0
+        for size_text, spacing_text in rows:
+            with timer(TOTAL_STAGE):
+                # Convertimos los valores de texto igual que la tabla de entrada
+                with timer("parse"):
+                    try:
+                        size = int(size_text)
+                        spacing = float(spacing_text)
+                        if size <= 0 or spacing <= 0:
+                            raise ValueError
+                    except ValueError:
+                        size = None
+                if size is None:
+                    inst.count("invalid")
+                    continue
+
+                arrival_time += spacing
+                packet = Packet(size=size, spacing=spacing, arrival_time=arrival_time)
+                with timer("mark_packet"):
+                    packet.color = token_bucket.mark_packet(packet)
+                inst.count("packets")
+            yield packet, token_bucket.tc, token_bucket.te
+    finally:
+        inst.uninstrument_method(token_bucket, "update")
+
+# Marca bloques numéricos (tamaños, espaciados), como los del generador, sin
+# pasar por texto; el tiempo de llegada continúa entre bloques. Los bloques pueden
+# ser arrays de NumPy o de "array" (cualquier secuencia con tolist()) y llevar una
+# tercera columna opcional de colores previos para el modo color-aware
+def mark_chunks(token_bucket: TokenBucket, chunks, instrumentation: Instrumentation = None):
+    inst = instrumentation or Instrumentation()
+    timer = inst.timer
+    arrival_time = 0.0
+    if not inst.enabled:
+        # Camino rápido sin temporizadores cuando la instrumentación está desactivada
+        mark_packet = token_bucket.mark_packet
+        for sizes, spacings, *pre_colors in chunks:
+            pre_colors = pre_colors[0] if pre_colors else repeat(None)
+            for size, spacing, pre_color in zip(sizes.tolist(), spacings.tolist(), pre_colors):
+                arrival_time += spacing
+                packet = Packet(size=size, spacing=spacing, arrival_time=arrival_time)
+                packet.color = mark_packet(packet, pre_color)
+                yield packet, token_bucket.tc, token_bucket.te
+        return
+
+    inst.instrument_method(token_bucket, "update")
+    try:
+        for sizes, spacings, *pre_colors in chunks:
+            pre_colors = pre_colors[0] if pre_colors else repeat(None)
+            for size, spacing, pre_color in zip(sizes.tolist(), spacings.tolist(), pre_colors):
+                with timer(TOTAL_STAGE):
+                    arrival_time += spacing
+                    packet = Packet(size=size, spacing=spacing, arrival_time=arrival_time)
+                    with timer("mark_packet"):
+                        packet.color = token_bucket.mark_packet(packet, pre_color)
+                    inst.count("packets")
+                yield packet, token_bucket.tc, token_bucket.te
+    finally:
+        inst.uninstrument_method(token_bucket, "update")
+
+# Marca una traza completa en un proceso hijo y devuelve (color, tc, te) por paquete
+def _mark_job(job):
+    from array import array
+    bucket_kwargs, sizes, spacings, *pre_colors = job
+    token_bucket = TokenBucket(**bucket_kwargs)
+    chunk = (array("q", sizes), array("d", spacings), *pre_colors)
+    return [(packet.color.plain, tc, te) for packet, tc, te in mark_chunks(token_bucket, [chunk])]
+
+# Marca varias trazas independientes en paralelo, una por proceso. Cada trabajo es
+# (parámetros del TokenBucket, tamaños, espaciados[, colores previos]). Cada traza
+# se marca con el mismo bucle que mark_chunks: el paralelismo es entre trazas
+def mark_parallel(jobs, max_workers: int = None):
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers) as pool:
+        return list(pool.map(_mark_job, jobs))
+
+# Punto de entrada para ejecuciones sin interfaz
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless srTCM marker")
+    parser.add_argument("trace", nargs="?", help="CSV file with size,spacing rows")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="mark N synthetic packets instead of reading a trace")
+    # Mismas opciones que generator.main (sin importar NumPy al arrancar)
+    parser.add_argument("--pattern", choices=("poisson", "onoff", "cbr"), default="poisson",
+                        help="arrival pattern for --generate")
+    parser.add_argument("--size", default="imix", help='"imix" or a fixed size')
+    parser.add_argument("--rate", type=float, default=1.0, help="packets per time unit")
+    parser.add_argument("--seed", type=int, help="random seed for --generate")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--burst-length", type=float, default=10.0)
+    parser.add_argument("--off-time", type=float, default=10.0)
+    parser.add_argument("--cbs", type=float, default=2000)
+    parser.add_argument("--ebs", type=float, default=2000)
+    parser.add_argument("--cir", type=float, default=1.0)
+    parser.add_argument("-o", "--output",
+                        help="export results to .parquet, .arrow/.ipc/.feather or .csv")
+    parser.add_argument("--profile", action="store_true",
+                        help="print the per-stage breakdown as JSON")
+    parser.add_argument("--profile-mode", choices=("cprofile", "sampling"),
+                        help="also capture a cProfile or sampling profile (stderr)")
+    args = parser.parse_args(argv)
+    if args.trace is None and args.generate is None:
+        parser.error("a trace file or --generate is required")
+
+    inst = Instrumentation(enabled=args.profile)
+    token_bucket = TokenBucket(cir=args.cir, cbs=args.cbs, ebs=args.ebs)
+    if args.profile_mode:
+        inst.start_profile(args.profile_mode)
+
+    if args.generate is not None:
+        from generator import generate
+        chunks = generate(args.generate, args.pattern, args.size, args.rate, args.seed,
+                          args.chunk_size, args.burst_length, args.off_time)
+        results = mark_chunks(token_bucket, chunks, inst)
+    else:
+        results = mark_trace(token_bucket, read_trace(args.trace), inst)
+
+    if args.output:
+        from export import export_results
+        export_results(args.output, results, bucket_column="te")
+    else:
+        for packet, tc, te in results:
+            if not args.profile:
+                print(f"{packet.size},{packet.arrival_time},{packet.color.plain},{tc},{te}")
+
+    if args.profile_mode:
+        print(inst.stop_profile(), file=sys.stderr)
+    if args.profile:
+        print(inst.to_json())
+
+if __name__ == "__main__":
+    main()
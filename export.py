@@ -0,0 +1,108 @@
+# Exportación de resultados de marcado a formatos columnares (Parquet, Arrow IPC)
+# o CSV. Se escribe por lotes para no construir toda la tabla en memoria.
+# pyarrow es opcional y solo se importa al escribir Parquet o Arrow
+import csv
+import os
+
+# Formatos soportados según la extensión del fichero
+FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".ipc": "arrow",
+           ".feather": "arrow", ".csv": "csv"}
+
+# Comprueba si pyarrow está disponible (necesario para Parquet y Arrow)
+def has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+# Deduce el formato a partir de la extensión del fichero
+def format_for_path(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported export format: {extension or path}")
+    return FORMATS[extension]
+
+# Escritor por lotes de resultados (paquete, tc, te/tp) con precisión completa
+class ResultWriter:
+    def __init__(self, path: str, bucket_column: str = "te", fmt: str = None,
+                 batch_size: int = 65536):
+        self.path = path
+        self.fmt = fmt or format_for_path(path)
+        self.batch_size = batch_size  # Filas por grupo de filas / lote
+        self.columns = ("size", "arrival_time", "color", "tc", bucket_column)
+        self._buffer = tuple([] for _ in self.columns)
+        self._writer = None
+        self._file = None
+
+        if self.fmt == "csv":
+            self._file = open(path, "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self.columns)
+        elif self.fmt in ("parquet", "arrow"):
+            if not has_pyarrow():
+                raise ImportError(f"pyarrow is required to export {self.fmt}; "
+                                  "use a .csv path instead")
+            import pyarrow as pa
+            self._schema = pa.schema([("size", pa.int64()), ("arrival_time", pa.float64()),
+                                      ("color", pa.string()), ("tc", pa.float64()),
+                                      (bucket_column, pa.float64())])
+            if self.fmt == "parquet":
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(path, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(path, self._schema)
+        else:
+            raise ValueError(f"Unsupported export format: {self.fmt}")
+
+    # Añade un resultado y vacía el lote cuando se llena
+    def write(self, packet, tc: float, bucket: float):
+        sizes, arrivals, colors, tcs, buckets = self._buffer
+        sizes.append(packet.size)
+        arrivals.append(packet.arrival_time)
+        colors.append(packet.color.plain)
+        tcs.append(tc)
+        buckets.append(bucket)
+        if len(sizes) >= self.batch_size:
+            self.flush()
+
+    # Escribe el lote pendiente como un grupo de filas (o filas CSV)
+    def flush(self):
+        if not self._buffer[0]:
+            return
+        if self.fmt == "csv":
+            self._writer.writerows(zip(*self._buffer))
+        else:
+            import pyarrow as pa
+            batch = pa.record_batch(list(self._buffer), schema=self._schema)
+            if self.fmt == "parquet":
+                self._writer.write_batch(batch)
+            else:
+                self._writer.write(batch)
+        for column in self._buffer:
+            column.clear()
+
+    # Vacía lo pendiente y cierra el fichero
+    def close(self):
+        self.flush()
+        if self.fmt == "csv":
+            self._file.close()
+        else:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+# Exporta un iterable de resultados (paquete, tc, te/tp) y devuelve las filas escritas
+def export_results(path: str, results, bucket_column: str = "te", fmt: str = None,
+                   batch_size: int = 65536) -> int:
+    rows = 0
+    with ResultWriter(path, bucket_column, fmt, batch_size) as writer:
+        for packet, tc, bucket in results:
+            writer.write(packet, tc, bucket)
+            rows += 1
+    return rows
@@ -1,7 +1,9 @@
-# Importamos las bibliotecas necesarias
+# Importamos las bibliotecas necesarias; Qt se importa solo al abrir la interfaz
 import sys
-from PySide6.QtWidgets import QApplication, QTableWidget
-from main_window import MainWindow
+import time
+
+# Instante de arranque para medir el tiempo hasta la primera ventana
+_START_TIME = time.perf_counter()
 
 # Función para aplicar estilos a la aplicación
 def apply_styles(app):
@@ -46,14 +48,43 @@ def apply_styles(app):
         }
     """)
 
-# Punto de entrada de la aplicación
-if __name__ == "__main__":
+# Ejecuta el motor de marcado sin cargar Qt
+def run_headless(argv, startup_timing=False):
+    import_start = time.perf_counter()
+    import engine
+    if startup_timing:
+        print(f"Engine import: {(time.perf_counter() - import_start) * 1e3:.1f} ms",
+              file=sys.stderr)
+    engine.main(argv)
+
+# Crea la aplicación Qt y muestra la ventana principal
+def run_gui(argv, startup_timing=False):
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QTimer
+    from main_window import MainWindow
+
     # Creamos la aplicación
-    app = QApplication(sys.argv)
+    app = QApplication(argv)
     # Aplicamos los estilos
     apply_styles(app)
     # Creamos y mostramos la ventana principal
     window = MainWindow()
     window.show()
+    if startup_timing:
+        # El temporizador se dispara con el primer ciclo del bucle de eventos
+        QTimer.singleShot(0, lambda: print(
+            f"Time to first window: {(time.perf_counter() - _START_TIME) * 1e3:.1f} ms",
+            file=sys.stderr))
     # Iniciamos el bucle de eventos
-    sys.exit(app.exec()) 
\ No newline at end of file
+    return app.exec()
+
+# Punto de entrada de la aplicación
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    startup_timing = "--startup-timing" in args
+    if startup_timing:
+        args.remove("--startup-timing")
+    if args and args[0] == "--headless":
+        run_headless(args[1:], startup_timing)
+    else:
+        sys.exit(run_gui([sys.argv[0]] + args, startup_timing))
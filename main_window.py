@@ -2,15 +2,48 @@
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                               QPushButton, QSpinBox, QLabel, QHeaderView,
                               QProgressBar, QGroupBox, QTableWidgetItem, 
-                              QTableWidget)
-from PySide6.QtCore import Qt, QTimer  # Importamos elementos core de Qt
-from PySide6.QtGui import QColor       # Importamos QColor para el manejo de colores
+                              QTableWidget, QCheckBox, QFileDialog,
+                              QMessageBox)
+from PySide6.QtCore import Qt, QTimer, QPointF  # Importamos elementos core de Qt
+from PySide6.QtGui import QColor, QPainter        # Colores y pintado del sparkline
 from custom_widgets import ValidatedTableWidget  # Nuestro widget personalizado
 from models import TokenBucket, Packet, Color    # Nuestros modelos de datos
+from instrumentation import Instrumentation, TOTAL_STAGE  # Medición por etapas
+from engine import read_trace                    # Lector de trazas CSV
+from export import export_results, has_pyarrow   # Exportación de resultados
+from collections import deque                    # Buffer circular del sparkline
+from itertools import islice
+
+# Máximo de filas que se cargan en la tabla de entrada al importar una traza
+MAX_IMPORT_ROWS = 10000
+
+# Intervalo mínimo entre repintados del visualizador (~30 fps)
+FRAME_INTERVAL_MS = 33
+
+# Gráfico compacto con los niveles de llenado recientes de un bucket
+class Sparkline(QWidget):
+    def __init__(self, capacity: int = 120):
+        super().__init__()
+        self.values = deque(maxlen=capacity)  # Buffer circular de niveles (0..1)
+        self.setMinimumHeight(30)
+
+    # Añade un nivel de llenado (fracción entre 0 y 1)
+    def add(self, fraction: float):
+        self.values.append(fraction)
+
+    def paintEvent(self, event):
+        if len(self.values) < 2:
+            return
+        painter = QPainter(self)
+        painter.setPen(QColor("#3498db"))
+        width, height = self.width() - 1, self.height() - 1
+        step = width / (self.values.maxlen - 1)
+        painter.drawPolyline([QPointF(i * step, height - value * height)
+                              for i, value in enumerate(self.values)])
 
 # Clase para visualizar el estado de los token buckets
 class TokenBucketVisualizer(QWidget):
-    def __init__(self):
+    def __init__(self, sparkline: bool = False):
         super().__init__()
         # Creamos el layout principal
         layout = QVBoxLayout(self)
@@ -31,21 +64,81 @@ class TokenBucketVisualizer(QWidget):
         te_layout.addWidget(self.te_bar)
         te_layout.addWidget(self.te_label)
         
+        # Sparklines opcionales con el historial reciente de llenado
+        self.tc_sparkline = self.te_sparkline = None
+        if sparkline:
+            self.tc_sparkline = Sparkline()
+            self.te_sparkline = Sparkline()
+            tc_layout.addWidget(self.tc_sparkline)
+            te_layout.addWidget(self.te_sparkline)
+        
         # Añadimos ambos grupos al layout principal
         layout.addWidget(tc_group)
         layout.addWidget(te_group)
+        
+        # Estado pendiente y estado mostrado (redondeado a la resolución de pantalla)
+        self._state = None
+        self._shown = None
+        # Temporizador de frame: agrupa las actualizaciones en un repintado por frame
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.setInterval(FRAME_INTERVAL_MS)
+        self.frame_timer.timeout.connect(self._render)
 
-    # Método para actualizar la visualización de los buckets
+    # Método para actualizar la visualización de los buckets: solo guarda el
+    # estado y programa el repintado para el siguiente frame
     def update_visualization(self, tc: float, te: float, cbs: float, ebs: float):
-        # Actualizamos la barra y etiqueta de tc
-        self.tc_bar.setMaximum(int(cbs))
-        self.tc_bar.setValue(int(tc))
-        self.tc_label.setText(f"{tc:.2f}/{cbs:.2f}")
-        
-        # Actualizamos la barra y etiqueta de te
-        self.te_bar.setMaximum(int(ebs))
-        self.te_bar.setValue(int(te))
-        self.te_label.setText(f"{te:.2f}/{ebs:.2f}")
+        self._state = (tc, te, cbs, ebs)
+        if self.tc_sparkline is not None:
+            self.tc_sparkline.add(tc / cbs if cbs else 0.0)
+            self.te_sparkline.add(te / ebs if ebs else 0.0)
+        if not self.frame_timer.isActive():
+            self.frame_timer.start()
+
+    # Repinta los widgets si el estado cambió a la resolución mostrada
+    def _render(self):
+        tc, te, cbs, ebs = self._state
+        shown = (round(tc, 2), round(te, 2), round(cbs, 2), round(ebs, 2))
+        if shown != self._shown:
+            self._shown = shown
+            # Actualizamos la barra y etiqueta de tc
+            self.tc_bar.setMaximum(int(cbs))
+            self.tc_bar.setValue(int(tc))
+            self.tc_label.setText(f"{tc:.2f}/{cbs:.2f}")
+            
+            # Actualizamos la barra y etiqueta de te
+            self.te_bar.setMaximum(int(ebs))
+            self.te_bar.setValue(int(te))
+            self.te_label.setText(f"{te:.2f}/{ebs:.2f}")
+        if self.tc_sparkline is not None:
+            self.tc_sparkline.update()
+            self.te_sparkline.update()
+
+    # Olvida el historial del sparkline y fuerza el repintado en el siguiente frame
+    def reset(self):
+        self._shown = None
+        if self.tc_sparkline is not None:
+            self.tc_sparkline.values.clear()
+            self.te_sparkline.values.clear()
+
+# Panel que muestra el desglose de tiempos por etapa
+class InstrumentationPanel(QGroupBox):
+    def __init__(self, instrumentation: Instrumentation):
+        super().__init__("Profiling")
+        self.instrumentation = instrumentation
+        layout = QVBoxLayout(self)
+        self.enabled_check = QCheckBox("Enabled")  # Activa o desactiva la medición
+        self.stats_label = QLabel("")              # Desglose por etapa
+        self.stats_label.setStyleSheet("font-family: monospace;")
+        layout.addWidget(self.enabled_check)
+        layout.addWidget(self.stats_label)
+
+    # Refresca el texto del desglose si la medición está activa
+    def refresh(self):
+        if self.instrumentation.enabled:
+            self.stats_label.setText(self.instrumentation.format_breakdown())
+        else:
+            self.stats_label.setText("")
 
 # Ventana principal de la aplicación
 class MainWindow(QMainWindow):
@@ -68,7 +161,7 @@ class MainWindow(QMainWindow):
         layout.addLayout(params_layout)
         
         # Añadimos el visualizador de token buckets
-        self.visualizer = TokenBucketVisualizer()
+        self.visualizer = TokenBucketVisualizer(sparkline=True)
         layout.addWidget(self.visualizer)
         
         # Creamos la tabla de entrada de paquetes
@@ -85,10 +178,12 @@ class MainWindow(QMainWindow):
         self.step_btn = QPushButton("Step")
         self.auto_btn = QPushButton("Auto")
         self.reset_btn = QPushButton("Reset")
+        self.import_btn = QPushButton("Import")
+        self.export_btn = QPushButton("Export")
         
         # Añadimos todos los botones al layout
         for btn in (self.add_row_btn, self.remove_row_btn, self.step_btn, 
-                   self.auto_btn, self.reset_btn):
+                   self.auto_btn, self.reset_btn, self.import_btn, self.export_btn):
             buttons_layout.addWidget(btn)
         layout.addLayout(buttons_layout)
         
@@ -100,9 +195,15 @@ class MainWindow(QMainWindow):
         self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         layout.addWidget(self.results_table)
         
+        # Añadimos el panel de instrumentación
+        self.instrumentation = Instrumentation()
+        self.instrumentation_panel = InstrumentationPanel(self.instrumentation)
+        layout.addWidget(self.instrumentation_panel)
+        
         # Inicializamos el estado de la aplicación
         self.current_row = 0
         self.token_bucket = None
+        self.results = []  # Resultados con precisión completa (paquete, tc, te)
         self.animation_timer = QTimer()
         self.animation_timer.timeout.connect(self._step)
         
@@ -112,7 +213,10 @@ class MainWindow(QMainWindow):
         self.step_btn.clicked.connect(self._step)
         self.auto_btn.clicked.connect(self._toggle_auto)
         self.reset_btn.clicked.connect(self._reset)
+        self.import_btn.clicked.connect(self._import_trace)
+        self.export_btn.clicked.connect(self._export_results)
         self.input_table.validation_changed.connect(self._update_button_states)
+        self.instrumentation_panel.enabled_check.toggled.connect(self._toggle_instrumentation)
         
         # Añadimos una fila inicial y reseteamos
         self._add_row()
@@ -141,15 +245,53 @@ class MainWindow(QMainWindow):
         if row >= 0:
             self.input_table.removeRow(row)
 
+    # Carga una traza CSV (tamaño,espaciado), p. ej. del generador, en la tabla de entrada
+    def _import_trace(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import trace", "", "CSV files (*.csv)")
+        if not path:
+            return
+        rows = list(islice(read_trace(path), MAX_IMPORT_ROWS + 1))
+        if len(rows) > MAX_IMPORT_ROWS:
+            # Las trazas grandes congelarían la tabla: se recortan y se avisa
+            rows = rows[:MAX_IMPORT_ROWS]
+            QMessageBox.warning(self, "Import trace",
+                                f"Only the first {MAX_IMPORT_ROWS} rows were imported. "
+                                "Use engine.py to mark the full trace.")
+        self.input_table.load_rows(rows)
+        self._reset()
+        self._update_button_states(len(self.input_table.valid_rows) > 0)
+
+    # Exporta los resultados con precisión completa a Parquet, Arrow o CSV
+    def _export_results(self):
+        filters = "CSV files (*.csv)"
+        if has_pyarrow():
+            filters = "Parquet files (*.parquet);;Arrow IPC files (*.arrow);;" + filters
+        path, selected = QFileDialog.getSaveFileName(self, "Export results", "", filters)
+        if path:
+            # Si no se escribe extensión, usamos la del filtro elegido (o .csv si el
+            # diálogo no devuelve ningún filtro)
+            if "." not in path.rsplit("/", 1)[-1]:
+                path += selected[selected.index("*") + 1:-1] if "*" in selected else ".csv"
+            try:
+                export_results(path, self.results, bucket_column="te")
+            except (ImportError, ValueError, OSError) as error:
+                QMessageBox.critical(self, "Export results", str(error))
+
     # Resetea el estado de la aplicación
     def _reset(self):
         self.current_row = 0
+        self.results = []
         cbs = self.cbs_input.itemAt(1).widget().value()
         ebs = self.ebs_input.itemAt(1).widget().value()
         self.token_bucket = TokenBucket(cir=1.0, cbs=cbs, ebs=ebs)
+        if self.instrumentation.enabled:
+            self.instrumentation.instrument_method(self.token_bucket, "update")
+        self.instrumentation.reset()
+        self.instrumentation_panel.refresh()
         
         self.results_table.setRowCount(0)
         
+        self.visualizer.reset()
         self.visualizer.update_visualization(
             self.token_bucket.tc,
             self.token_bucket.te,
@@ -166,38 +308,56 @@ class MainWindow(QMainWindow):
             self.auto_btn.setText("Auto")
             return False
 
+        timer = self.instrumentation.timer
+        with timer(TOTAL_STAGE):
+            result = self._process_row(timer)
+        self.instrumentation_panel.refresh()
+        return result
+
+    # Procesa la fila actual midiendo cada etapa
+    def _process_row(self, timer):
         size_item = self.input_table.item(self.current_row, 0)
         spacing_item = self.input_table.item(self.current_row, 1)
 
         if size_item and spacing_item:
             try:
                 # Obtenemos los datos del paquete
-                size = int(size_item.text())
-                spacing = float(spacing_item.text())
-                arrival_time = spacing if self.current_row == 0 else \
-                    float(self.results_table.item(self.current_row - 1, 1).text()) + spacing
+                with timer("parse"):
+                    size = int(size_item.text())
+                    spacing = float(spacing_item.text())
+                    # El tiempo de llegada se acumula en coma flotante; la tabla solo lo muestra
+                    arrival_time = spacing if not self.results else \
+                        self.results[-1][0].arrival_time + spacing
 
                 # Creamos y procesamos el paquete
                 packet = Packet(size=size, spacing=spacing, arrival_time=arrival_time)
-                color = self.token_bucket.mark_packet(packet)
+                with timer("mark_packet"):
+                    color = self.token_bucket.mark_packet(packet)
+                self.instrumentation.count("packets")
+
+                # Guardamos el resultado con precisión completa para exportarlo
+                packet.color = color
+                self.results.append((packet, self.token_bucket.tc, self.token_bucket.te))
 
                 # Añadimos los resultados a la tabla
-                self.results_table.insertRow(self.current_row)
-                self.results_table.setItem(self.current_row, 0, QTableWidgetItem(str(size)))
-                self.results_table.setItem(self.current_row, 1, QTableWidgetItem(f"{arrival_time:.2f}"))
-                color_item = QTableWidgetItem(color.plain)
-                color_item.setForeground(QColor(color.color_code))
-                self.results_table.setItem(self.current_row, 2, color_item)
-                self.results_table.setItem(self.current_row, 3, QTableWidgetItem(f"{self.token_bucket.tc:.2f}"))
-                self.results_table.setItem(self.current_row, 4, QTableWidgetItem(f"{self.token_bucket.te:.2f}"))
+                with timer("table_insert"):
+                    self.results_table.insertRow(self.current_row)
+                    self.results_table.setItem(self.current_row, 0, QTableWidgetItem(str(size)))
+                    self.results_table.setItem(self.current_row, 1, QTableWidgetItem(f"{arrival_time:.2f}"))
+                    color_item = QTableWidgetItem(color.plain)
+                    color_item.setForeground(QColor(color.color_code))
+                    self.results_table.setItem(self.current_row, 2, color_item)
+                    self.results_table.setItem(self.current_row, 3, QTableWidgetItem(f"{self.token_bucket.tc:.2f}"))
+                    self.results_table.setItem(self.current_row, 4, QTableWidgetItem(f"{self.token_bucket.te:.2f}"))
 
                 # Actualizamos la visualización
-                self.visualizer.update_visualization(
-                    self.token_bucket.tc,
-                    self.token_bucket.te,
-                    self.token_bucket.cbs,
-                    self.token_bucket.ebs
-                )
+                with timer("visualize"):
+                    self.visualizer.update_visualization(
+                        self.token_bucket.tc,
+                        self.token_bucket.te,
+                        self.token_bucket.cbs,
+                        self.token_bucket.ebs
+                    )
 
                 self.current_row += 1
                 return True
@@ -222,4 +382,13 @@ class MainWindow(QMainWindow):
         self.step_btn.setEnabled(has_rows and is_valid and 
                                 self.current_row < self.input_table.rowCount())
         self.auto_btn.setEnabled(has_rows and is_valid and 
-                                self.current_row < self.input_table.rowCount())
\ No newline at end of file
+                                self.current_row < self.input_table.rowCount())
+
+    # Activa o desactiva la instrumentación del marcado
+    def _toggle_instrumentation(self, enabled: bool):
+        self.instrumentation.enabled = enabled
+        if enabled:
+            self.instrumentation.instrument_method(self.token_bucket, "update")
+        else:
+            self.instrumentation.uninstrument_method(self.token_bucket, "update")
+        self.instrumentation_panel.refresh()
\ No newline at end of file
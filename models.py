@@ -21,6 +21,8 @@ class Packet:
     spacing: float                # Tiempo entre este paquete y el anterior
     arrival_time: float           # Tiempo de llegada absoluto
     color: Optional[Color] = None # Color asignado (inicialmente None)
+    flow: int = 0                 # Identificador de flujo (para policers por flujo)
+    port: int = 0                 # Puerto de salida (para policers por puerto)
 
 # Clase principal que implementa el algoritmo Token Bucket
 class TokenBucket:
@@ -50,16 +52,21 @@ class TokenBucket:
         
         self.last_update = current_time
 
-    def mark_packet(self, packet: Packet) -> Color:
+    def mark_packet(self, packet: Packet, pre_color: Optional[Color] = None) -> Color:
         # Actualizamos los tokens antes de procesar el paquete
         self.update(packet.arrival_time)
         
+        # En modo color-aware un paquete nunca mejora su color previo. Normalizamos
+        # por valor para aceptar también colores de la variante trTCM
+        if pre_color is not None:
+            pre_color = Color(pre_color.value)
+        
         # Aplicamos el algoritmo srTCM
-        if self.tc >= packet.size:
+        if self.tc >= packet.size and pre_color in (None, Color.GREEN):
             # Si hay suficientes tokens en tc, marcamos como verde
             self.tc -= packet.size
             return Color.GREEN
-        elif self.te >= packet.size:
+        elif self.te >= packet.size and pre_color is not Color.RED:
             # Si hay suficientes tokens en te, marcamos como amarillo
             self.te -= packet.size
             return Color.YELLOW